@@ -1,13 +1,70 @@
-import pandas as pd
+from __future__ import annotations
+
+import numpy as np
 import os
+import re
+import sys
 from pathlib import Path
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the kernel still runs as plain Python
+    njit = None
+
+# Deletes every hex digit, so a string is valid hex iff it translates to ''.
+# str.translate runs the scan in C, without per-character Python tests.
+_NON_HEX = str.maketrans('', '', '0123456789ABCDEFabcdef')
+
+
+def _group_ids(packed: np.ndarray, min_prefix_chars: int) -> np.ndarray:
+    """Assign a group id to each row of lexicographically sorted packed EPCs.
+
+    packed is a uint8 array of shape (N, 12) holding the raw EPC bytes in
+    sorted order. Consecutive rows whose common prefix reaches
+    min_prefix_chars hex characters share a group id; a new id starts at
+    each row where the prefix with its predecessor falls short. Compiled
+    with numba when available, so the byte loop runs at native speed.
+    """
+    n = packed.shape[0]
+    gids = np.empty(n, np.int64)
+    if n == 0:
+        return gids
+    gid = 0
+    gids[0] = 0
+    for i in range(1, n):
+        lcp = 0
+        for j in range(12):
+            a = packed[i - 1, j]
+            b = packed[i, j]
+            if a == b:
+                lcp += 2
+            else:
+                if (a >> 4) == (b >> 4):
+                    lcp += 1
+                break
+        if lcp < min_prefix_chars:
+            gid += 1
+        gids[i] = gid
+    return gids
+
+
+if njit is not None:
+    _group_ids = njit(cache=True)(_group_ids)
 
 
 class EPCAnalyzer:
     def __init__(self):
         self.min_prefix_length = 6
         self.analysis_results = []
+        # (N, 12) uint8 array of decoded EPC bytes, filled by load_epcs and
+        # aligned with the list it returned; lets group_and_analyze reuse
+        # the decoded form instead of re-running bytes.fromhex
+        self.epc_bytes = None
+        self._cached_epcs = None
     
     def load_epcs(self, file_path: str) -> List[str]:
         """Load EPCs from file. Supports .txt, .csv, .xlsx files."""
@@ -16,118 +73,153 @@ class EPCAnalyzer:
         if not path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        epcs = []
-        
         if path.suffix.lower() in ['.txt', '.csv']:
-            # Read text/CSV files (one EPC per line)
-            with open(path, 'r') as f:
-                for line_num, line in enumerate(f, 1):
-                    epc = line.strip()
-                    if epc and len(epc) == 24 and all(c in '0123456789ABCDEFabcdef' for c in epc):
-                        epcs.append(epc.upper())
-                    elif epc:  # Non-empty but invalid
-                        print(f"Skipping invalid EPC at line {line_num}: {epc}")
-        
+            # Read text/CSV files (one EPC per line): one regex pass over
+            # the whole uppercased buffer extracts every valid EPC, with no
+            # per-line Python work on the happy path
+            text = path.read_text().upper()
+            epcs = re.findall(r'(?m)^[ \t]*([0-9A-F]{24})[ \t]*$', text)
+            invalid = set(map(str.strip, text.splitlines())) - set(epcs) - {''}
+            for epc in sorted(invalid):
+                print(f"Skipping invalid EPC: {epc}")
+
         elif path.suffix.lower() == '.xlsx':
-            # Read Excel file (first column)
-            df = pd.read_excel(path, header=None)
-            for idx, epc in enumerate(df.iloc[:, 0], 1):
-                epc = str(epc).strip()
-                if len(epc) == 24 and all(c in '0123456789ABCDEFabcdef' for c in epc):
-                    epcs.append(epc.upper())
-                else:
-                    print(f"Skipping invalid EPC at row {idx}: {epc}")
-        
+            # pandas (and openpyxl behind it) is only needed here, so import
+            # lazily to keep text-file runs free of its ~1 s import cost
+            import pandas as pd
+
+            # Read Excel file: only materialize the first column, as text,
+            # instead of parsing and type-inferring the whole sheet
+            df = pd.read_excel(path, header=None, usecols=[0], dtype=str)
+            col = df.iloc[:, 0].str.strip()
+            mask = (col.str.len().eq(24)
+                    & col.str.translate(_NON_HEX).eq('')).fillna(False)
+            invalid = col[~mask & col.notna()]
+            for idx, epc in zip(invalid.index + 1, invalid):
+                print(f"Skipping invalid EPC at row {idx}: {epc}")
+            epcs = col[mask].str.upper().tolist()
+
         else:
             raise ValueError("Unsupported file format. Use .txt, .csv, or .xlsx")
         
         if not epcs:
             raise ValueError("No valid EPCs found in file")
-        
+
+        # Decode the whole batch to raw bytes once (SoA layout); every
+        # later pass works on this buffer instead of the hex strings.
+        # The cache key is an immutable snapshot of the list, so later
+        # mutations of the returned list can never match it.
+        self.epc_bytes = np.frombuffer(bytes.fromhex(''.join(epcs)),
+                                       np.uint8).reshape(-1, 12)
+        self._cached_epcs = tuple(epcs)
+
         print(f"Loaded {len(epcs)} valid EPCs from {path.name}")
         return epcs
     
     def group_and_analyze(self, epcs: List[str]) -> pd.DataFrame:
         """Group EPCs by prefix and analyze compression."""
-        groups = []
-        remaining = epcs[:]
-        
-        # Create groups based on common prefix
-        while remaining:
-            base = remaining.pop(0)
-            group = [base]
-            
-            # Find EPCs with common prefix >= 6 chars
-            i = 0
-            while i < len(remaining):
-                common_len = sum(1 for a, b in zip(base, remaining[i]) if a == b)
-                if common_len >= self.min_prefix_length:
-                    group.append(remaining.pop(i))
-                else:
-                    i += 1
-            groups.append(group)
-        
-        # Analyze each group
-        results = []
-        for gid, group in enumerate(groups, 1):
-            if len(group) == 1:
+        import pandas as pd
+
+        if not epcs:
+            results_df = pd.DataFrame(columns=[
+                'Group_ID', 'Prefix', 'Prefix_Bytes', 'Suffix_Bytes',
+                'Suffix_Count', 'Total_Payload_Bytes', 'EPCs_SF7_51B',
+                'EPCs_SF12_11B', 'Compression_%'])
+            self.analysis_results = results_df
+            return results_df
+
+        # Create groups based on common prefix: sort once, then EPCs sharing
+        # a prefix >= 6 chars end up adjacent. One linear pass over the sorted
+        # list splits it into groups wherever the common prefix with the
+        # previous EPC drops below the threshold (O(N log N) instead of the
+        # old O(N^2) pairwise scan, and independent of input order).
+        if self._cached_epcs is not None and tuple(epcs) == self._cached_epcs:
+            # Reuse the bytes decoded by load_epcs. Comparing against the
+            # immutable snapshot is O(N) like the decode it saves, but
+            # detects any mutation of the returned list; sorting the byte
+            # rows (uppercase hex order == byte order) then replaces the
+            # string sort
+            order = np.lexsort(self.epc_bytes.T[::-1])
+            packed = self.epc_bytes[order]
+            epcs_sorted = [epcs[i] for i in order]
+        else:
+            epcs_sorted = sorted(epcs)
+            packed = np.frombuffer(bytes.fromhex(''.join(epcs_sorted)),
+                                   np.uint8).reshape(-1, 12)
+        gids = _group_ids(packed, self.min_prefix_length)
+        starts = np.flatnonzero(np.diff(gids)) + 1
+        bounds = [0] + starts.tolist() + [len(epcs_sorted)]
+
+        # Single pass over the groups: only the prefix (a string) and its
+        # length need per-group Python work, everything else vectorizes
+        n_groups = len(bounds) - 1
+        suffix_count = np.diff(bounds)
+        prefix_len = np.zeros(n_groups, np.int64)
+        prefixes = []
+        for g, (a, b) in enumerate(zip(bounds, bounds[1:])):
+            if b - a == 1:
                 # Single EPC - no compression
-                results.append({
-                    'Group_ID': gid,
-                    'Prefix': '',
-                    'Prefix_Bytes': 0,
-                    'Suffix_Bytes': 12,
-                    'Suffix_Count': 1,
-                    'Total_Payload_Bytes': 14,
-                    'EPCs_SF7_51B': 3,
-                    'EPCs_SF12_11B': 0,
-                    'Compression_%': 0
-                })
+                prefixes.append('')
             else:
-                # Find common prefix
-                prefix_len = min(len(min(group, key=len)), 
-                               max(self.min_prefix_length,
-                                   sum(1 for chars in zip(*group) if len(set(chars)) == 1)))
-                
-                prefix = group[0][:prefix_len]
-                prefix_bytes = prefix_len // 2
-                suffix_bytes = (24 - prefix_len) // 2
-                suffix_count = len(group)
-                
-                # Calculate payload: header(1) + prefix_len(1) + prefix + suffixes
-                total_payload = 2 + prefix_bytes + (suffix_count * suffix_bytes)
-                
-                # LoRaWAN capacity
-                overhead = 2 + prefix_bytes
-                epcs_sf7 = max(0, (51 - overhead) // suffix_bytes) if suffix_bytes > 0 else 0
-                epcs_sf12 = max(0, (11 - overhead) // suffix_bytes) if suffix_bytes > 0 else 0
-                
-                # Compression ratio
-                uncompressed = len(group) * 12
-                compression = round(((uncompressed - total_payload) / uncompressed * 100), 1)
-                
-                results.append({
-                    'Group_ID': gid,
-                    'Prefix': prefix,
-                    'Prefix_Bytes': prefix_bytes,
-                    'Suffix_Bytes': suffix_bytes,
-                    'Suffix_Count': suffix_count,
-                    'Total_Payload_Bytes': total_payload,
-                    'EPCs_SF7_51B': epcs_sf7,
-                    'EPCs_SF12_11B': epcs_sf12,
-                    'Compression_%': compression
-                })
-        
+                # The group is a sorted run, so its common prefix equals the
+                # common prefix of its first and last member: one XOR finds
+                # it instead of a set per column over the whole group (and a
+                # mismatch column no longer ends up inside the "prefix")
+                x = (int.from_bytes(packed[a], 'big')
+                     ^ int.from_bytes(packed[b - 1], 'big'))
+                prefix_len[g] = (96 - x.bit_length()) // 4 if x else 24
+                prefixes.append(epcs_sorted[a][:prefix_len[g]])
+
+        # Column math over all groups at once; singletons keep their fixed
+        # row (12-byte suffix, 14-byte payload, 3 EPCs in an SF7 frame)
+        multi = suffix_count > 1
+        prefix_bytes = np.where(multi, prefix_len // 2, 0)
+        suffix_bytes = np.where(multi, (24 - prefix_len) // 2, 12)
+
+        # Calculate payload: header(1) + prefix_len(1) + prefix + suffixes
+        total_payload = np.where(multi, 2 + prefix_bytes + suffix_count * suffix_bytes, 14)
+
+        # LoRaWAN capacity
+        overhead = 2 + prefix_bytes
+        divisor = np.where(suffix_bytes > 0, suffix_bytes, 1)
+        epcs_sf7 = np.where(multi,
+                            np.where(suffix_bytes > 0,
+                                     np.maximum(0, (51 - overhead) // divisor), 0),
+                            3)
+        epcs_sf12 = np.where(suffix_bytes > 0,
+                             np.maximum(0, (11 - overhead) // divisor), 0) * multi
+
+        # Compression ratio
+        uncompressed = suffix_count * 12
+        compression = np.where(multi,
+                               np.round((uncompressed - total_payload) / uncompressed * 100, 1),
+                               0.0)
+
+        results_df = pd.DataFrame({
+            'Group_ID': np.arange(1, n_groups + 1),
+            'Prefix': prefixes,
+            'Prefix_Bytes': prefix_bytes,
+            'Suffix_Bytes': suffix_bytes,
+            'Suffix_Count': suffix_count,
+            'Total_Payload_Bytes': total_payload,
+            'EPCs_SF7_51B': epcs_sf7,
+            'EPCs_SF12_11B': epcs_sf12,
+            'Compression_%': compression
+        })
+
         # Store results for later use
-        self.analysis_results = results
-        return pd.DataFrame(results)
+        self.analysis_results = results_df
+        return results_df
     
     def save_results(self, df: pd.DataFrame, output_path: str) -> str:
         """Save results to specified Excel file path."""
         try:
-            # Create results DataFrame
-            results_df = pd.DataFrame(self.analysis_results)
-            results_df.to_excel(output_path, index=False, engine='openpyxl')
+            # Write the DataFrame we were given; rebuilding it from
+            # analysis_results duplicated the frame and could silently
+            # diverge from what the caller passed in.
+            # xlsxwriter streams rows without openpyxl's per-cell style
+            # bookkeeping, which dominates to_excel time on larger tables
+            df.to_excel(output_path, index=False, engine='xlsxwriter')
             print(f"✅ Excel file created successfully at: {output_path}")
             return output_path
         except Exception as e:
@@ -136,21 +228,26 @@ class EPCAnalyzer:
     
     def print_summary(self, df: pd.DataFrame):
         """Print analysis summary."""
-        print("\n" + "="*80)
-        print("EPC LoRaWAN Compression Analysis")
-        print("="*80)
-        print(df.to_string(index=False))
-        
+        # Collect everything and emit one write instead of a print per line.
+        # to_csv goes through pandas' C writer and skips to_string's
+        # per-cell formatting and column-width pass
+        lines = ["\n" + "="*80,
+                 "EPC LoRaWAN Compression Analysis",
+                 "="*80,
+                 df.to_csv(sep='|', index=False, float_format='%.1f').rstrip('\n')]
+
         # Statistics
         total_epcs = df['Suffix_Count'].sum()
         total_payload = df['Total_Payload_Bytes'].sum()
         uncompressed = total_epcs * 12
         savings = uncompressed - total_payload
-        
-        print(f"\nSummary:")
-        print(f"  Total EPCs: {total_epcs} | Groups: {len(df)}")
-        print(f"  Uncompressed: {uncompressed}B | Compressed: {total_payload}B")
-        print(f"  Savings: {savings}B ({savings/uncompressed*100:.1f}%)")
+
+        lines.append(f"\nSummary:")
+        lines.append(f"  Total EPCs: {total_epcs} | Groups: {len(df)}")
+        lines.append(f"  Uncompressed: {uncompressed}B | Compressed: {total_payload}B")
+        lines.append(f"  Savings: {savings}B ({savings/uncompressed*100:.1f}%)")
+
+        sys.stdout.write('\n'.join(lines) + '\n')
 
 
 def main():
@@ -1,9 +1,30 @@
-import random
 import struct
 import math
+import sys
+import numpy as np
 from typing import List, Dict, Optional
 from datetime import datetime
 
+try:
+    from numba import njit
+except ImportError:  # numba optionnel ; la formule reste du Python pur
+    njit = None
+
+
+def _airtime_symbols(payload_bytes: int, sf: int, cr: int) -> float:
+    """Nombre de symboles payload (N_payload) de la formule LoRa.
+
+    Noyau purement numérique, compilé par numba quand il est disponible :
+    utile pour les balayages SF/payload où la formule est évaluée en boucle.
+    """
+    PL_H = 1 if sf >= 11 else 0  # Header présent si SF >= 11
+    return 8 + max((8 * payload_bytes - 4 * sf + 28 + 16 - 20 * PL_H) / (4 * (sf - 2)), 0.0) * (cr + 4)
+
+
+if njit is not None:
+    _airtime_symbols = njit(cache=True)(_airtime_symbols)
+
+
 class EPCLoRaWANCalculator:
     """
     Calculateur LoRaWAN pour encapsuler les EPCs RFID avec calculs de temps d'antenne.
@@ -32,7 +53,13 @@ class EPCLoRaWANCalculator:
             self.max_payload_size = payload_size
             
         self.max_epcs_per_packet = (self.max_payload_size - self.header_size) // self.epc_size_bytes
-        
+
+        # Invariants de la formule airtime : ne dépendent que de SF et BW,
+        # donc calculés une seule fois ici
+        self.t_sym = (2 ** self.sf) / (self.bw * 1000)
+        self.t_pream = (8 + 4.25) * self.t_sym
+        self._airtime_cache = {}
+
         print(f"=== CONFIGURATION LoRaWAN ===")
         print(f"SF: {self.sf}, BW: {self.bw} kHz, CR: 4/{self.cr + 4}")
         print(f"Taille max payload: {self.max_payload_size} octets")
@@ -55,11 +82,10 @@ class EPCLoRaWANCalculator:
         Returns:
             List[str]: Liste des EPCs
         """
-        epcs = []
-        for _ in range(n):
-            epc = ''.join(random.choices('0123456789ABCDEF', k=24))
-            epcs.append(epc)
-        return epcs
+        # Tire les 12n octets en un seul appel NumPy au lieu de 24 tirages
+        # Python par EPC, puis encode chaque ligne en hex en un appel C
+        raw = np.random.randint(0, 256, size=(n, 12), dtype=np.uint8)
+        return [raw[i].tobytes().hex().upper() for i in range(n)]
     
     def calculate_airtime_parameters(self, payload_bytes: int) -> Dict:
         """
@@ -71,21 +97,26 @@ class EPCLoRaWANCalculator:
         Returns:
             Dict: Paramètres calculés
         """
-        # Formules du tableau
-        T_sym = (2**self.sf) / (self.bw * 1000)  # Durée d'un symbole en secondes
-        T_pream = (8 + 4.25) * T_sym  # Durée du préambule
-        
-        # Calcul du nombre de symboles payload
-        PL_H = 1 if self.sf >= 11 else 0  # Header présent si SF >= 11
-        N_payload = 8 + max(((8 * payload_bytes - 4 * self.sf + 28 + 16 - 20 * PL_H) / (4 * (self.sf - 2))), 0) * (self.cr + 4)
-        
+        # Mémoïsation : la formule ne dépend que de payload_bytes, les
+        # autres paramètres (SF, BW, CR) sont fixés à la construction
+        cached = self._airtime_cache.get(payload_bytes)
+        if cached is not None:
+            return cached
+
+        # Formules du tableau (T_sym et T_pream précalculés dans __init__)
+        T_sym = self.t_sym
+        T_pream = self.t_pream
+
+        # Calcul du nombre de symboles payload (noyau compilé)
+        N_payload = _airtime_symbols(payload_bytes, self.sf, self.cr)
+
         T_payload = N_payload * T_sym  # Durée payload
         T_frame = T_pream + T_payload  # Durée totale de la trame
-        
+
         # Calcul des EPCs par trame
         EPC_frame = math.floor((self.max_payload_size - self.header_size) / self.epc_size_bytes)
-        
-        return {
+
+        result = {
             'T_sym_ms': T_sym * 1000,
             'T_pream_ms': T_pream * 1000,
             'N_payload': N_payload,
@@ -93,6 +124,8 @@ class EPCLoRaWANCalculator:
             'T_frame_ms': T_frame * 1000,
             'EPC_frame': EPC_frame
         }
+        self._airtime_cache[payload_bytes] = result
+        return result
     
     def calculate_transmission_plan(self, total_epcs: int) -> Dict:
         """
@@ -106,13 +139,9 @@ class EPCLoRaWANCalculator:
         """
         # Nombre de trames nécessaires
         N_frames = math.ceil(total_epcs / self.max_epcs_per_packet)
-        
-        # Calcul pour 700 EPCs (référence du tableau)
-        params_700 = self.calculate_airtime_parameters(self.max_payload_size)
-        T_frame_700 = params_700['T_frame_ms']
-        T_batch_700 = math.ceil(700 / self.max_epcs_per_packet) * T_frame_700
-        
-        # Calcul pour le nombre d'EPCs demandé
+
+        # Paramètres airtime pour une trame pleine (un seul calcul :
+        # l'ancien appel dupliqué donnait exactement le même résultat)
         params_current = self.calculate_airtime_parameters(self.max_payload_size)
         T_frame_current = params_current['T_frame_ms']
         T_batch_current = N_frames * T_frame_current
@@ -143,10 +172,12 @@ class EPCLoRaWANCalculator:
         if len(epcs) > self.max_epcs_per_packet:
             raise ValueError(f"Trop d'EPCs pour un seul packet. Max: {self.max_epcs_per_packet}")
         
-        header = self.create_packet_header(packet_id, len(epcs))
-        epc_bytes = b''.join(bytes.fromhex(epc) for epc in epcs)
-        
-        return header + epc_bytes
+        # Buffer préalloué rempli tranche par tranche : une seule
+        # allocation au lieu d'un fromhex par EPC suivi d'un join
+        buf = bytearray(self.header_size + len(epcs) * self.epc_size_bytes)
+        buf[:self.header_size] = self.create_packet_header(packet_id, len(epcs))
+        buf[self.header_size:] = bytes.fromhex(''.join(epcs))
+        return bytes(buf)
     
     def decode_payload(self, payload: bytes) -> Dict:
         """Décode un payload LoRaWAN pour extraire les informations."""
@@ -190,11 +221,15 @@ class EPCLoRaWANCalculator:
         """
         # Générer les EPCs
         epcs = self.generate_random_epc(epc_count)
-        
+
+        # Sortie accumulée puis émise en un seul write : évite un appel
+        # print (verrou IO + flush) par ligne sur les gros lots
+        lines = []
+
         # Afficher les EPCs générés
-        print(f"EPCs générés: {len(epcs)}")
+        lines.append(f"EPCs générés: {len(epcs)}")
         for i, epc in enumerate(epcs):
-            print(f"  EPC {i+1}: {epc}")
+            lines.append(f"  EPC {i+1}: {epc}")
         
         # Créer les payloads
         payloads = []
@@ -215,39 +250,41 @@ class EPCLoRaWANCalculator:
             })
         
         # Afficher les payloads avec calculs
-        print(f"\nPayloads LoRaWAN créés: {len(payloads)}")
-        
+        lines.append(f"\nPayloads LoRaWAN créés: {len(payloads)}")
+
         for i, detail in enumerate(payload_details):
             payload = detail['payload']
             packet_epcs = detail['epcs']
             params = detail['params']
-            
-            print(f"  Payload {i+1}: {payload.hex().upper()} ({len(payload)} octets)")
-            
+
+            lines.append(f"  Payload {i+1}: {payload.hex().upper()} ({len(payload)} octets)")
+
             # Décoder pour afficher les détails
             decoded = self.decode_payload(payload)
-            print(f"    Packet ID: {decoded['packet_id']}, EPCs: {decoded['epc_count']}")
-            print(f"    EPCs décodés: {decoded['epcs']}")
-            
+            lines.append(f"    Packet ID: {decoded['packet_id']}, EPCs: {decoded['epc_count']}")
+            lines.append(f"    EPCs décodés: {decoded['epcs']}")
+
             # Afficher les calculs pour ce payload
-            print(f"    CALCULS LoRaWAN:")
-            print(f"      • Durée symbole (T_sym): {params['T_sym_ms']:.2f} ms")
-            print(f"      • Durée préambule (T_pream): {params['T_pream_ms']:.2f} ms")
-            print(f"      • Nombre symboles payload (N_payload): {params['N_payload']:.0f}")
-            print(f"      • Durée payload (T_payload): {params['T_payload_ms']:.2f} ms")
-            print(f"      • Durée totale trame (T_frame): {params['T_frame_ms']:.2f} ms")
-            print(f"      • EPCs max par trame: {params['EPC_frame']}")
-            print()
-        
+            lines.append(f"    CALCULS LoRaWAN:")
+            lines.append(f"      • Durée symbole (T_sym): {params['T_sym_ms']:.2f} ms")
+            lines.append(f"      • Durée préambule (T_pream): {params['T_pream_ms']:.2f} ms")
+            lines.append(f"      • Nombre symboles payload (N_payload): {params['N_payload']:.0f}")
+            lines.append(f"      • Durée payload (T_payload): {params['T_payload_ms']:.2f} ms")
+            lines.append(f"      • Durée totale trame (T_frame): {params['T_frame_ms']:.2f} ms")
+            lines.append(f"      • EPCs max par trame: {params['EPC_frame']}")
+            lines.append("")
+
         # Calculer le plan de transmission global
         plan = self.calculate_transmission_plan(epc_count)
-        
+
         # Résumé final
-        print(f"=== RÉSUMÉ TRANSMISSION ===")
-        print(f"Total EPCs traités: {epc_count}")
-        print(f"Nombre de trames: {plan['frames_needed']}")
-        print(f"Durée totale du lot: {plan['batch_duration_s']:.2f} s")
-        print(f"Débit max par jour (1% duty): {plan['max_epcs_per_day']:,} EPCs/jour")
+        lines.append(f"=== RÉSUMÉ TRANSMISSION ===")
+        lines.append(f"Total EPCs traités: {epc_count}")
+        lines.append(f"Nombre de trames: {plan['frames_needed']}")
+        lines.append(f"Durée totale du lot: {plan['batch_duration_s']:.2f} s")
+        lines.append(f"Débit max par jour (1% duty): {plan['max_epcs_per_day']:,} EPCs/jour")
+
+        sys.stdout.write('\n'.join(lines) + '\n')
         
         return {
             'epcs': epcs,